@@ -0,0 +1,168 @@
+import csv
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, reset_queries
+from django.test.utils import (CaptureQueriesContext,
+                               setup_test_environment,
+                               teardown_test_environment)
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import reconcile_counters
+from recipes.feed import rebuild_feeds
+from recipes.hits import flush_views
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag, generate_short_link)
+from recipes.search import update_search_index
+from recipes.shopping_cart import rebuild_shopping_lists
+from users.models import Subscription, User
+
+INGREDIENTS_CSV = settings.BASE_DIR.parent / 'data' / 'ingredients.csv'
+BATCH_SIZE = 1000
+TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+)
+
+
+@contextmanager
+def throwaway_database(keepdb=False):
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        flush_views()
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
+        teardown_test_environment()
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def read_ingredients(limit):
+    if INGREDIENTS_CSV.exists():
+        with open(INGREDIENTS_CSV, encoding='utf-8') as file:
+            for name, measurement_unit in islice(csv.reader(file), limit):
+                yield name, measurement_unit
+                limit -= 1
+    for number in range(limit):
+        yield f'ингредиент {number}', 'г'
+
+
+def seed(recipes, ingredients, users, seed_value=0):
+    rnd = random.Random(seed_value)
+    password = make_password(None)
+    for batch in batched(
+        User(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password,
+        )
+        for number in range(users)
+    ):
+        User.objects.bulk_create(batch)
+    user_ids = list(User.objects.values_list('id', flat=True))
+    Token.objects.bulk_create(
+        [Token(key=Token.generate_key(), user_id=id) for id in user_ids],
+        batch_size=BATCH_SIZE,
+    )
+    Tag.objects.bulk_create([Tag(name=name, slug=slug) for name, slug in TAGS])
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    Ingredient.objects.bulk_create(
+        [
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in read_ingredients(ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    for batch in batched(
+        Recipe(
+            author_id=rnd.choice(user_ids),
+            name=f'Рецепт {number}',
+            image='recipes/images/benchmark.png',
+            text='Описание рецепта. ' * rnd.randint(5, 50),
+            cooking_time=rnd.randint(1, 180),
+            short_link=generate_short_link(),
+        )
+        for number in range(recipes)
+    ):
+        Recipe.objects.bulk_create(batch)
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    RecipeTag = Recipe.tags.through
+    for batch in batched(
+        RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rnd.sample(tag_ids, rnd.randint(1, 2))
+    ):
+        RecipeTag.objects.bulk_create(batch)
+    for batch in batched(
+        RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rnd.randint(1, 500),
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rnd.sample(ingredient_ids, rnd.randint(3, 10))
+    ):
+        RecipeIngredient.objects.bulk_create(batch)
+    for model in (Favorite, ShoppingCart):
+        for batch in batched(
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in rnd.sample(
+                recipe_ids, min(len(recipe_ids), rnd.randint(0, 15))
+            )
+        ):
+            model.objects.bulk_create(batch)
+    for batch in batched(
+        Subscription(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rnd.sample(
+            user_ids, min(len(user_ids), rnd.randint(0, 20))
+        )
+        if author_id != user_id
+    ):
+        Subscription.objects.bulk_create(batch)
+    rebuild_shopping_lists()
+    reconcile_counters()
+    rebuild_feeds()
+    for batch in batched(recipe_ids):
+        update_search_index(batch)
+
+
+def percentile(timings, value):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[value - 1]
+
+
+def measure(call, iterations):
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        call()
+    queries = len(context)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return queries, percentile(timings, 50), percentile(timings, 95)
@@ -0,0 +1,72 @@
+from functools import wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+
+from recipes.recipes_const import REFERENCE_CACHE_TIMEOUT
+from recipes.versions import get_version, get_viewer_version_name
+
+from .renderers import FastJSONRenderer
+
+RESPONSE_KEY = 'response:{name}:{version}:{query}'
+COUNTER_FIELDS = ('favorites_count', 'cart_count')
+
+
+def cached_json_response(request, name, get_data):
+    version, last_modified = get_version(name)
+    query = md5(request.get_full_path().encode()).hexdigest()
+    etag = f'"{version}-{query[:12]}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    )
+    if response is None:
+        key = RESPONSE_KEY.format(name=name, version=version, query=query)
+        content = cache.get(key)
+        if content is None:
+            content = FastJSONRenderer().render(get_data())
+            cache.set(key, content, timeout=REFERENCE_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def get_conditional_versions(name, request):
+    names = [name]
+    if request.user.is_authenticated:
+        names.append(get_viewer_version_name(request.user.pk))
+    ordering = request.query_params.get('ordering', '')
+    if any(field in ordering for field in COUNTER_FIELDS):
+        names.append(f'{name}_counters')
+    return ':'.join(get_version(name)[0] for name in names)
+
+
+def conditional(name):
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            versions = md5(
+                get_conditional_versions(name, request).encode()
+            ).hexdigest()
+            query = md5(
+                f'{request.user.pk}:{request.get_full_path()}'.encode()
+            ).hexdigest()
+            etag = f'"{versions}-{query[:12]}"'
+            response = None
+            if request.META.get('HTTP_IF_NONE_MATCH', '').strip() != '*':
+                response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorator
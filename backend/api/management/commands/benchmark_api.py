@@ -0,0 +1,148 @@
+from urllib.parse import quote
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import measure, seed, throwaway_database
+from recipes.hits import flush_views, record_view
+from recipes.models import Ingredient, Recipe
+from recipes.paginations import CustomPagination
+from users.models import User
+
+# Верхние границы числа SQL-запросов на один запрос к API.
+# Каждая граница задана функцией от размера страницы: рост числа
+# запросов вместе со страницей означает N+1. Токен клиента к моменту
+# замера уже в кэше, поэтому его проверка в границы не входит.
+QUERY_BUDGETS = {
+    'recipes': lambda limit: 5,
+    'recipes (anonymous)': lambda limit: 4,
+    'recipes (deep page)': lambda limit: 5,
+    'recipes (cursor)': lambda limit: 4,
+    'recipe detail': lambda limit: 4,
+    'subscriptions': lambda limit: 3,
+    'feed': lambda limit: 6,
+    'trending': lambda limit: 5,
+    'ingredients': lambda limit: 1,
+    'ingredients search': lambda limit: 1,
+    'tags': lambda limit: 1,
+    'download_shopping_cart': lambda limit: 1,
+}
+
+
+class Command(BaseCommand):
+    help = ('Наполняет временную базу синтетическими данными и измеряет '
+            'число SQL-запросов и время ответа эндпоинтов API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--page-sizes', type=lambda value: [
+                int(size) for size in value.split(',')
+            ],
+            default=[6, 24, 100],
+        )
+        parser.add_argument(
+            '--accept-encoding', default='',
+            help='Заголовок Accept-Encoding, например "br, gzip".',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument(
+            '--no-assert', action='store_true',
+            help='Только вывести результаты, не проверяя границы.',
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database(keepdb=options['keepdb']):
+            if not User.objects.exists():
+                self.stdout.write('Наполнение базы...')
+                seed(
+                    recipes=options['recipes'],
+                    ingredients=options['ingredients'],
+                    users=options['users'],
+                )
+            self.accept_encoding = options['accept_encoding']
+            violations = self.run_benchmarks(options)
+        if violations and not options['no_assert']:
+            raise CommandError(
+                'Превышено число запросов:\n' + '\n'.join(violations)
+            )
+
+    def get_endpoints(self, page_sizes):
+        user = User.objects.annotate(
+            subscriptions_count=Count('subscribes')
+        ).order_by('-subscriptions_count').first()
+        token = Token.objects.get(user=user)
+        authorized = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        authorized.get('/api/users/me/')
+        anonymous = Client()
+        recipe_id = user.recipes.values_list('id', flat=True).first()
+        pagination = CustomPagination()
+        recipes = Recipe.objects.order_by(*pagination.cursor_ordering)
+        for id in recipes.values_list('id', flat=True)[::7]:
+            record_view(id)
+        flush_views()
+        for limit in page_sizes:
+            yield ('recipes', limit, authorized,
+                   f'/api/recipes/?limit={limit}')
+            yield ('recipes (anonymous)', limit, anonymous,
+                   f'/api/recipes/?limit={limit}&page=2')
+            page = recipes.count() // limit
+            yield ('recipes (deep page)', limit, authorized,
+                   f'/api/recipes/?limit={limit}&page={page}')
+            cursor = pagination.encode_cursor(
+                recipes[(page - 1) * limit - 1]
+            )
+            yield ('recipes (cursor)', limit, authorized,
+                   f'/api/recipes/?limit={limit}&cursor={cursor}')
+            yield ('feed', limit, authorized,
+                   f'/api/recipes/feed/?limit={limit}')
+            yield ('trending', limit, authorized,
+                   f'/api/recipes/trending/?limit={limit}')
+            yield ('subscriptions', limit, authorized,
+                   f'/api/users/subscriptions/?limit={limit}'
+                   f'&recipes_limit=3')
+        yield 'recipe detail', 1, authorized, f'/api/recipes/{recipe_id}/'
+        yield 'ingredients', None, anonymous, '/api/ingredients/'
+        name = Ingredient.objects.values_list('name', flat=True).first()
+        yield ('ingredients search', None, anonymous,
+               f'/api/ingredients/?name={quote(name[:3])}')
+        yield 'tags', None, anonymous, '/api/tags/'
+        yield ('download_shopping_cart', None, authorized,
+               '/api/recipes/download_shopping_cart/')
+
+    def run_benchmarks(self, options):
+        violations = []
+        self.stdout.write(
+            f'{"эндпоинт":<25}{"limit":>7}{"запросов":>10}{"бюджет":>8}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"байт":>10}'
+        )
+        for name, limit, client, url in self.get_endpoints(
+            options['page_sizes']
+        ):
+            queries, p50, p95 = measure(
+                lambda: self.get(client, url), options['iterations']
+            )
+            budget = QUERY_BUDGETS[name](limit)
+            self.stdout.write(
+                f'{name:<25}{limit or "-":>7}{queries:>10}{budget:>8}'
+                f'{p50:>10.2f}{p95:>10.2f}{self.size:>10}'
+            )
+            if queries > budget:
+                violations.append(f'{url}: {queries} > {budget}')
+        return violations
+
+    def get(self, client, url):
+        response = client.get(
+            url, HTTP_ACCEPT_ENCODING=self.accept_encoding
+        )
+        if response.status_code != 200:
+            raise CommandError(f'{url} вернул {response.status_code}')
+        if response.streaming:
+            self.size = len(b''.join(response.streaming_content))
+        else:
+            self.size = len(response.content)
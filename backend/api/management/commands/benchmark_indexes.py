@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmarks import measure, seed, throwaway_database
+from recipes.models import Favorite, Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+# Индексы и ограничения, которые ускоряют горячие запросы.
+# На время замера "до" они удаляются из схемы.
+INDEXES = (
+    (Ingredient, 'ingredient_name_like_idx'),
+    (Recipe, 'recipe_pub_date_idx'),
+    (Recipe, 'recipe_author_pub_date_idx'),
+)
+CONSTRAINTS = (
+    (RecipeIngredient, 'unique_recipe_ingredient'),
+)
+
+
+def get_by_name(items, name):
+    return next(item for item in items if item.name == name)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает планы и время горячих запросов без индексов '
+            'и с индексами на временной базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write('Наполнение базы...')
+            seed(
+                recipes=options['recipes'],
+                ingredients=options['ingredients'],
+                users=options['users'],
+            )
+            queries = self.get_queries()
+            self.set_indexes(enabled=False)
+            before = self.run_queries(queries, options['iterations'])
+            self.set_indexes(enabled=True)
+            after = self.run_queries(queries, options['iterations'])
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for title, (plan, p50, p95) in (
+                ('без индексов', before[name]),
+                ('с индексами', after[name]),
+            ):
+                self.stdout.write(
+                    f'  {title}: p50 {p50:.3f} мс, p95 {p95:.3f} мс'
+                )
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def get_queries(self):
+        favorite = Favorite.objects.order_by('?').first()
+        recipe_id = Recipe.objects.order_by('?').values_list(
+            'id', flat=True
+        ).first()
+        author = User.objects.filter(recipes__isnull=False).first()
+        return {
+            'Избранное по (user, recipe)': Favorite.objects.filter(
+                user_id=favorite.user_id, recipe_id=favorite.recipe_id
+            ),
+            'Ингредиенты рецепта': RecipeIngredient.objects.filter(
+                recipe_id=recipe_id
+            ),
+            'Лента рецептов по дате': Recipe.objects.all()[:6],
+            'Рецепты автора по дате': Recipe.objects.filter(
+                author=author
+            )[:6],
+            'Поиск ингредиента по началу названия': Ingredient.objects.filter(
+                name__startswith='мо'
+            ),
+        }
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for model, name in INDEXES:
+                index = get_by_name(model._meta.indexes, name)
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+            for model, name in CONSTRAINTS:
+                constraint = get_by_name(model._meta.constraints, name)
+                if enabled:
+                    editor.add_constraint(model, constraint)
+                else:
+                    editor.remove_constraint(model, constraint)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def run_queries(self, queries, iterations):
+        results = {}
+        for name, queryset in queries.items():
+            _, p50, p95 = measure(lambda: list(queryset.all()), iterations)
+            results[name] = queryset.explain(), p50, p95
+        return results
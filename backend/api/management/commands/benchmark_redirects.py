@@ -0,0 +1,56 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from api.benchmarks import seed, throwaway_database
+from recipes.models import Recipe
+from recipes.short_links import links
+
+
+class Command(BaseCommand):
+    help = ('Измеряет число переадресаций в секунду по коротким ссылкам '
+            'с холодным кэшем, из общего кэша и из кэша процесса.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--links', type=int, default=1000)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write('Наполнение базы...')
+            seed(recipes=options['recipes'], ingredients=100, users=100)
+            urls = [
+                f'/s/{code}/'
+                for code in Recipe.objects.order_by('?').values_list(
+                    'short_link', flat=True
+                )[:options['links']]
+            ]
+            client = Client()
+            for title, reset in (
+                ('без кэша', self.reset_all),
+                ('общий кэш', links.clear),
+                ('кэш процесса', None),
+            ):
+                self.reset_all()
+                self.run(client, urls)
+                rate = self.run(client, urls, options['rounds'], reset)
+                self.stdout.write(f'{title:<15}{rate:>10.0f} переадресаций/с')
+
+    def reset_all(self):
+        links.clear()
+        cache.clear()
+
+    def run(self, client, urls, rounds=1, reset=None):
+        elapsed = 0
+        for _ in range(rounds):
+            if reset:
+                reset()
+            start = time.perf_counter()
+            for url in urls:
+                response = client.get(url)
+                assert response.status_code == 302, url
+            elapsed += time.perf_counter() - start
+        return len(urls) * rounds / elapsed
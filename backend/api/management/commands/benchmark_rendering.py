@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.benchmarks import seed, throwaway_database
+from api.renderers import FastJSONRenderer
+from recipes.models import Recipe
+from recipes.representations import represent_recipes
+from recipes.serializers import RecipeListSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает число отрисованных в секунду страниц рецептов '
+            'через RecipeListSerializer и через быстрый путь и проверяет, '
+            'что ответы совпадают побайтно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--seconds', type=float, default=3)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write('Наполнение базы...')
+            seed(recipes=options['recipes'], ingredients=500, users=200)
+            self.user = User.objects.first()
+            self.limit = options['page_size']
+            before = JSONRenderer().render(self.serializer_page())
+            after = FastJSONRenderer().render(self.fast_page())
+            if before != after:
+                raise CommandError('Ответы быстрого пути отличаются.')
+            for title, get_page, renderer in (
+                ('RecipeListSerializer', self.serializer_page, JSONRenderer()),
+                ('быстрый путь', self.fast_page, FastJSONRenderer()),
+            ):
+                rate = self.run(
+                    lambda: renderer.render(get_page()), options['seconds']
+                )
+                self.stdout.write(f'{title:<25}{rate:>10.0f} страниц/с')
+
+    def get_request(self):
+        request = Request(RequestFactory().get('/api/recipes/'))
+        request.user = self.user
+        return request
+
+    def serializer_page(self):
+        return RecipeListSerializer(
+            Recipe.objects.with_related()[:self.limit], many=True,
+            context={'request': self.get_request()},
+        ).data
+
+    def fast_page(self):
+        return represent_recipes(
+            list(Recipe.objects.select_related('author')[:self.limit]),
+            self.get_request(),
+        )
+
+    def run(self, call, seconds):
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            call()
+            count += 1
+        return count / (time.perf_counter() - start)
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from recipes.recipes_const import METRICS_BUCKETS
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+current = ContextVar('request_metrics', default=None)
+
+
+@lru_cache(maxsize=1024)
+def get_fingerprint(sql):
+    return NUMBER.sub('?', IN_LIST.sub('IN (...)', sql))
+
+
+@contextmanager
+def timer(name):
+    metrics = current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.timings[name] += time.perf_counter() - start
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.timings = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[get_fingerprint(sql)] += 1
+
+    def get_duplicates(self):
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count > 1
+        ]
+
+
+def escape_label(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(names, values, **extra):
+    labels = [
+        f'{name}="{escape_label(value)}"'
+        for name, value in (*zip(names, values), *extra.items())
+    ]
+    return '{' + ','.join(labels) + '}'
+
+
+class Registry:
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.durations = {}
+        self.queries = Counter()
+        self.db_time = Counter()
+        self.duplicates = Counter()
+
+    def observe(self, view, method, status, duration, metrics):
+        key = view, method
+        duplicates = sum(count - 1 for _, count in metrics.get_duplicates())
+        with self.lock:
+            self.requests[view, method, status] += 1
+            histogram = self.durations.setdefault(
+                key, [0] * len(self.buckets) + [0, 0.0]
+            )
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += duration
+            self.queries[key] += metrics.queries
+            self.db_time[key] += metrics.db_time
+            self.duplicates[key] += duplicates
+
+    def render(self):
+        with self.lock:
+            requests = dict(self.requests)
+            durations = {key: list(value)
+                         for key, value in self.durations.items()}
+            counters = (
+                ('foodgram_db_queries_total', 'counter',
+                 'SQL-запросы по представлениям.', dict(self.queries)),
+                ('foodgram_db_duration_seconds_total', 'counter',
+                 'Время SQL-запросов по представлениям.',
+                 dict(self.db_time)),
+                ('foodgram_db_duplicate_queries_total', 'counter',
+                 'Повторы запросов с одинаковым отпечатком (N+1).',
+                 dict(self.duplicates)),
+            )
+        lines = [
+            '# HELP foodgram_http_requests_total Запросы к API.',
+            '# TYPE foodgram_http_requests_total counter',
+        ]
+        for labels, count in sorted(requests.items()):
+            lines.append(
+                'foodgram_http_requests_total'
+                f'{format_labels(("view", "method", "status"), labels)} '
+                f'{count}'
+            )
+        lines += [
+            '# HELP foodgram_http_request_duration_seconds '
+            'Время обработки запросов.',
+            '# TYPE foodgram_http_request_duration_seconds histogram',
+        ]
+        name = 'foodgram_http_request_duration_seconds'
+        for labels, histogram in sorted(durations.items()):
+            for bound, count in zip(
+                (*self.buckets, '+Inf'), histogram[:-1]
+            ):
+                lines.append(
+                    f'{name}_bucket'
+                    f'{format_labels(("view", "method"), labels, le=bound)} '
+                    f'{count}'
+                )
+            labels = format_labels(('view', 'method'), labels)
+            lines.append(f'{name}_sum{labels} {histogram[-1]}')
+            lines.append(f'{name}_count{labels} {histogram[-2]}')
+        for name, kind, description, values in counters:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(values.items()):
+                lines.append(
+                    f'{name}{format_labels(("view", "method"), labels)} '
+                    f'{value}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+from gzip import compress as gzip_compress
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.recipes_const import (BROTLI_QUALITY, COMPRESSIBLE_TYPES,
+                                   COMPRESSION_MIN_SIZE, GZIP_LEVEL,
+                                   METRICS_LOGGED_DUPLICATES,
+                                   METRICS_N_PLUS_ONE_THRESHOLD)
+from users.authentication import CachingTokenAuthentication
+
+from .metrics import RequestMetrics, current, registry, timer
+from .profiling import PROFILERS, RateLimiter, get_profile_path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('api.metrics')
+
+API_PREFIX = '/api/'
+PROFILE_PARAM = '_profile'
+ETAG_ENCODING = re.compile(r'-(?:br|gzip)"')
+
+COMPRESSORS = {
+    'gzip': lambda content: gzip_compress(
+        content, compresslevel=GZIP_LEVEL, mtime=0
+    ),
+}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda content: brotli.compress(
+        content, quality=BROTLI_QUALITY
+    )
+
+
+def get_encoding(accept_encoding):
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        weight = 1.0
+        match = re.search(r'q=([\d.]+)', params)
+        if match:
+            try:
+                weight = float(match.group(1))
+            except ValueError:
+                weight = 0
+        weights[coding.strip().lower()] = weight
+    default = weights.get('*', 0)
+    for encoding in ('br', 'gzip'):
+        if encoding in COMPRESSORS and weights.get(encoding, default) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    return response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+
+
+def add_etag_encoding(response, encoding):
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/') and etag.endswith('"'):
+        response['ETag'] = f'{etag[:-1]}-{encoding}"'
+
+
+class CompressionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = None
+        if request.path.startswith(API_PREFIX):
+            encoding = get_encoding(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+        if encoding and 'HTTP_IF_NONE_MATCH' in request.META:
+            request.META['HTTP_IF_NONE_MATCH'] = ETAG_ENCODING.sub(
+                '"', request.META['HTTP_IF_NONE_MATCH']
+            )
+        response = self.get_response(request)
+        if encoding is None:
+            return response
+        if response.status_code == 304:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            add_etag_encoding(response, encoding)
+            return response
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+        with timer('compress'):
+            content = COMPRESSORS[encoding](response.content)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        add_etag_encoding(response, encoding)
+        return response
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def add_server_timing(response, duration, metrics):
+    entries = [
+        f'total;dur={duration * 1000:.2f}',
+        f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries}"',
+        *(
+            f'{name};dur={value * 1000:.2f}'
+            for name, value in metrics.timings.items()
+        ),
+    ]
+    if response.has_header('Server-Timing'):
+        entries.append(response['Server-Timing'])
+    response['Server-Timing'] = ', '.join(entries)
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        duration = time.perf_counter() - start
+        view = get_view_name(request)
+        registry.observe(
+            view, request.method, response.status_code, duration, metrics
+        )
+        add_server_timing(response, duration, metrics)
+        duplicates = metrics.get_duplicates()
+        level = logging.INFO
+        if duplicates and duplicates[0][1] >= METRICS_N_PLUS_ONE_THRESHOLD:
+            level = logging.WARNING
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'timings_ms': {
+                    name: round(value * 1000, 2)
+                    for name, value in metrics.timings.items()
+                },
+                'duplicates': [
+                    {'sql': fingerprint, 'count': count}
+                    for fingerprint, count
+                    in duplicates[:METRICS_LOGGED_DUPLICATES]
+                ],
+            }, ensure_ascii=False))
+        return response
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        result = CachingTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limiter = RateLimiter()
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+
+    def __call__(self, request):
+        mode = request.GET.get(PROFILE_PARAM) or request.META.get(
+            'HTTP_X_PROFILE'
+        )
+        if mode is None:
+            if not self.sample_rate:
+                return self.get_response(request)
+            if random.random() * 100 >= self.sample_rate:
+                return self.get_response(request)
+            mode = 'sample'
+            requested = False
+        elif mode not in PROFILERS or not is_staff(request):
+            return self.get_response(request)
+        else:
+            requested = True
+        if not self.limiter.acquire():
+            response = self.get_response(request)
+            if requested:
+                response['X-Profile'] = 'rate-limited'
+            return response
+        profiler = PROFILERS[mode]()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+            if response.streaming:
+                response.streaming_content = [
+                    b''.join(response.streaming_content)
+                ]
+        finally:
+            profiler.stop()
+        path = get_profile_path(request, profiler.extension)
+        profiler.write(path)
+        if requested:
+            response['X-Profile'] = os.path.basename(path)
+        return response
@@ -0,0 +1,89 @@
+import json
+
+from django.conf import settings
+from django.core.files.uploadhandler import (FileUploadHandler, SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.http.multipartparser import MultiPartParser as DjangoParser
+from django.http.multipartparser import MultiPartParserError
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from recipes.recipes_const import (IMAGE_SIGNATURES, IMAGE_UPLOAD_MAX_SIZE,
+                                   IMAGE_UPLOAD_TYPES)
+
+
+class JSONPartData(dict):
+    # Request объединяет данные и файлы через update(); у MultiValueDict
+    # обычный dict.update() скопировал бы списки значений вместо файлов.
+
+    def copy(self):
+        return type(self)(self)
+
+    def update(self, other):
+        if isinstance(other, MultiValueDict):
+            other = other.dict()
+        super().update(other)
+
+
+class ImageUploadHandler(FileUploadHandler):
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = {}
+
+    def reject(self, message):
+        self.errors[self.field_name] = [message]
+        raise SkipFile()
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 *args, **kwargs):
+        super().new_file(field_name, file_name, content_type,
+                         content_length, *args, **kwargs)
+        if content_type not in IMAGE_UPLOAD_TYPES:
+            self.reject(f'Недопустимый тип файла: {content_type}.')
+        if content_length and content_length > IMAGE_UPLOAD_MAX_SIZE:
+            self.reject('Файл слишком большой.')
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not any(
+            raw_data[offset:offset + len(signature)] == signature
+            for offset, signature in IMAGE_SIGNATURES
+        ):
+            self.reject('Файл не является изображением.')
+        if start + len(raw_data) > IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(f'Размер файла превышает '
+                        f'{IMAGE_UPLOAD_MAX_SIZE // 1024 // 1024} МБ.')
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class ImageMultiPartParser(MultiPartParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        checker = ImageUploadHandler(request)
+        upload_handlers = [checker, TemporaryFileUploadHandler(request)]
+        try:
+            data, files = DjangoParser(
+                meta, stream, upload_handlers, encoding
+            ).parse()
+        except MultiPartParserError as exc:
+            raise ParseError(f'Ошибка разбора multipart: {exc}')
+        if checker.errors:
+            raise ValidationError(checker.errors)
+        if 'data' not in data:
+            return DataAndFiles(data, files)
+        try:
+            payload = json.loads(data['data'])
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            raise ParseError('Поле data должно содержать JSON-объект.')
+        return DataAndFiles(JSONPartData(payload), files)
@@ -0,0 +1,109 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from uuid import uuid4
+
+from django.conf import settings
+
+from recipes.recipes_const import (PROFILE_RATE_LIMIT,
+                                   PROFILE_RATE_PERIOD,
+                                   PROFILE_SAMPLE_INTERVAL)
+
+PATH_SEPARATORS = re.compile(r'\W+')
+
+
+class CProfileProfiler:
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def write(self, path):
+        self.profiler.dump_stats(path)
+
+
+class SamplingProfiler:
+    extension = 'collapsed'
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name='profile-sampler', daemon=True
+        )
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.collapse(frame)] += 1
+
+    def collapse(self, frame):
+        names = []
+        while frame is not None:
+            names.append(
+                f'{frame.f_globals.get("__name__", "?")}'
+                f'.{frame.f_code.co_name}'
+            )
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+PROFILERS = {
+    '1': CProfileProfiler,
+    'cprofile': CProfileProfiler,
+    'sample': SamplingProfiler,
+}
+
+
+class RateLimiter:
+
+    def __init__(self, limit=PROFILE_RATE_LIMIT, period=PROFILE_RATE_PERIOD):
+        self.limit = limit
+        self.period = period
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.calls and self.calls[0] <= now - self.period:
+                self.calls.popleft()
+            if len(self.calls) >= self.limit:
+                return False
+            self.calls.append(now)
+            return True
+
+
+def get_profile_path(request, extension):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = PATH_SEPARATORS.sub('_', request.path).strip('_') or 'root'
+    return os.path.join(
+        settings.PROFILE_DIR,
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-{uuid4().hex[:8]}'
+        f'.{extension}',
+    )
@@ -0,0 +1,106 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .metrics import timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timer('render'):
+            return self.render_json(
+                data, accepted_media_type, renderer_context
+            )
+
+    def render_json(self, data, accepted_media_type, renderer_context):
+        if orjson is None or data is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return content.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class PlainTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRendererMixin:
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list):
+            return ''.join(self.iter_render(data)).encode('utf-8')
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class ShoppingCartTextRenderer(ShoppingCartRendererMixin, PlainTextRenderer):
+
+    def iter_render(self, items):
+        yield 'Список покупок:\n\n'
+        for index, (name, measurement_unit, amount) in enumerate(
+            items, start=1
+        ):
+            yield f'{index}. {name}({measurement_unit}) - {amount}\n'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRendererMixin, PlainTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def iter_render(self, items):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in items:
+            yield writer.writerow(item)
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRendererMixin, JSONRenderer):
+
+    def iter_render(self, items):
+        separator = ''
+        yield '['
+        for name, measurement_unit, amount in items:
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                    'amount': amount,
+                },
+                ensure_ascii=False,
+                separators=(',', ':'),
+            )
+            separator = ','
+        yield ']'
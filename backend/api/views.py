@@ -1,20 +1,36 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+import time
+
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
-from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
 
+from recipes.autocomplete import get_index
+from recipes.feed import get_feed_page
 from recipes.filters import IngredientFilter, RecipeFilter
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+from recipes.hits import record_view
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 from recipes.paginations import CustomPagination
+from recipes.recipes_const import AUTOCOMPLETE_LIMIT
+from recipes.representations import represent_recipe, represent_recipes
 from recipes.serializers import (IngredientSerializer,
                                  RecipeCreateUpdateSerializer,
                                  RecipeListSerializer,
                                  RecipeSimpleListSerializer, TagSerializer)
+from recipes.shopping_cart import iter_shopping_list
+from recipes.short_links import get_recipe_url, resolve_short_link
+from users.paginations import parse_id
+
+from .caching import cached_json_response, conditional
+from .metrics import registry, timer
+from .parsers import ImageMultiPartParser
+from .renderers import (ShoppingCartCSVRenderer, ShoppingCartJSONRenderer,
+                        ShoppingCartTextRenderer)
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -23,23 +39,89 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        return cached_json_response(request, 'ingredients', self.get_items)
+
+    def get_items(self):
+        index = get_index()
+        name = self.request.query_params.get('name')
+        if name:
+            return index.search(name, AUTOCOMPLETE_LIMIT)
+        return index.items
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
+    def list(self, request, *args, **kwargs):
+        return cached_json_response(
+            request, 'tags', lambda: list(
+                self.get_queryset().values('id', 'name', 'slug')
+            )
+        )
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
-    filter_backends = (DjangoFilterBackend,)
+    parser_classes = (JSONParser, ImageMultiPartParser)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     pagination_class = CustomPagination
     filterset_class = RecipeFilter
+    ordering_fields = ('pub_date', 'favorites_count', 'cart_count')
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('author')
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeListSerializer
         return RecipeCreateUpdateSerializer
 
+    def list_recipes(self, queryset):
+        page = self.paginate_queryset(queryset)
+        with timer('serialize'):
+            data = represent_recipes(page, self.request)
+        return self.get_paginated_response(data)
+
+    @conditional('recipes')
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'search' not in request.query_params:
+            return self.list_recipes(queryset)
+        start = time.perf_counter()
+        response = self.list_recipes(queryset)
+        response['Server-Timing'] = (
+            f'search;dur={(time.perf_counter() - start) * 1000:.2f}'
+        )
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.retrieve_recipe(request, *args, **kwargs)
+        if response.status_code != status.HTTP_304_NOT_MODIFIED:
+            return response
+        try:
+            pk = parse_id(self.kwargs['pk'])
+        except ValueError:
+            return response
+        if Recipe.objects.filter(pk=pk).exists():
+            record_view(pk)
+        return response
+
+    @conditional('recipes')
+    def retrieve_recipe(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        record_view(recipe.id)
+        with timer('serialize'):
+            return Response(represent_recipe(recipe, request))
+
+    @action(detail=False)
+    def trending(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            trending_score__gt=0
+        ).order_by('-trending_score', '-id')
+        return self.list_recipes(queryset)
+
     def add_to(self, model, user, pk):
         if model.objects.filter(user=user, recipe__id=pk).exists():
             return Response(
@@ -77,32 +159,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            ShoppingCartTextRenderer,
+            ShoppingCartCSVRenderer,
+            ShoppingCartJSONRenderer,
+        ],
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        response = HttpResponse(content_type='text/plain')
-
-        shopping_cart = ShoppingCart.objects.filter(user=user).values_list(
-            'recipe', flat=True
+        renderer = request.accepted_renderer
+        lines = renderer.iter_render(iter_shopping_list(request.user))
+        response = StreamingHttpResponse(
+            (line.encode('utf-8') for line in lines),
+            content_type=f'{renderer.media_type}; charset=utf-8',
         )
-
-        ingredients_sum = (
-            RecipeIngredient.objects.filter(recipe__in=shopping_cart)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_cart.{renderer.format}"'
         )
-
-        response.write('Список покупок:\n\n'.encode('utf-8'))
-        for index, item in enumerate(ingredients_sum, start=1):
-            line = (
-                f'{index}. {item["ingredient__name"]}'
-                f'({item["ingredient__measurement_unit"]}) - '
-                f'{item["total_amount"]}\n'
-            )
-            response.write(line.encode('utf-8'))
         return response
 
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    @conditional('recipes')
+    def feed(self, request):
+        queryset = self.get_queryset()
+        page = self.paginator.paginate_keyset(
+            request,
+            lambda values, limit: get_feed_page(
+                queryset, request.user, values, limit
+            ),
+        )
+        with timer('serialize'):
+            data = represent_recipes(page, request)
+        return self.get_paginated_response(data)
+
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
         recipe = self.get_object()
@@ -113,5 +202,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
 
 def redirect_short_link(request, short_id):
-    recipe = get_object_or_404(Recipe, short_link=short_id)
-    return redirect(f'/recipes/{recipe.id}')
+    recipe_id = resolve_short_link(short_id)
+    if recipe_id is None:
+        raise Http404('Короткая ссылка не найдена.')
+    record_view(recipe_id)
+    return redirect(get_recipe_url(recipe_id))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
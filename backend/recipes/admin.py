@@ -1,7 +1,9 @@
 from django.contrib import admin
 
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+from .models import (Favorite, FeedEntry, Ingredient, Recipe,
+                     RecipeIngredient, ShoppingCart, ShoppingListItem, Tag)
+from .search import update_search_index
+from .shopping_cart import get_recipe_amounts, recipe_ingredients_changed
 
 
 @admin.register(Ingredient)
@@ -24,12 +26,22 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'author', 'in_favorites')
+    list_display = (
+        'pk', 'name', 'author', 'in_favorites', 'cart_count', 'views_count'
+    )
     list_filter = ('author', 'name', 'tags')
+    list_select_related = ('author',)
     inlines = [RecipeIngredientInline]
 
+    @admin.display(description='В избранном', ordering='favorites_count')
     def in_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = get_recipe_amounts(form.instance.id) if change else {}
+        super().save_related(request, form, formsets, change)
+        recipe_ingredients_changed(form.instance.id, old_amounts)
+        update_search_index([form.instance.id])
 
 
 @admin.register(Favorite)
@@ -40,3 +52,15 @@ class FavoriteAdmin(admin.ModelAdmin):
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user')
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'total_amount')
+    list_select_related = ('user', 'ingredient')
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'recipe', 'pub_date')
+    list_select_related = ('user', 'recipe')
@@ -0,0 +1,104 @@
+import heapq
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from .models import Ingredient
+from .recipes_const import AUTOCOMPLETE_MIN_SIMILARITY
+from .versions import get_version
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+def get_trigrams(value):
+    padded = f'  {value} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class IngredientIndex:
+
+    def __init__(self, ingredients, version=None):
+        self.version = version
+        self.items = sorted(
+            (
+                {
+                    'id': id,
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                }
+                for id, name, measurement_unit in ingredients
+            ),
+            key=lambda item: (normalize(item['name']), item['id']),
+        )
+        self.keys = [normalize(item['name']) for item in self.items]
+        self.trigram_counts = []
+        self.postings = {}
+        for position, key in enumerate(self.keys):
+            trigrams = get_trigrams(key)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(position)
+
+    def find_prefix(self, query, limit):
+        positions = []
+        for position in range(bisect_left(self.keys, query), len(self.keys)):
+            if len(positions) == limit:
+                break
+            if not self.keys[position].startswith(query):
+                break
+            positions.append(position)
+        return positions
+
+    def find_similar(self, query, limit, exclude):
+        trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        candidates = []
+        for position, count in shared.items():
+            containment = count / len(trigrams)
+            if position in exclude:
+                continue
+            if containment < AUTOCOMPLETE_MIN_SIMILARITY:
+                continue
+            similarity = count / (
+                len(trigrams) + self.trigram_counts[position] - count
+            )
+            candidates.append((containment, similarity, -position))
+        return [
+            -position
+            for _, _, position in heapq.nlargest(limit, candidates)
+        ]
+
+    def search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return self.items[:limit]
+        positions = self.find_prefix(query, limit)
+        if len(positions) < limit:
+            positions += self.find_similar(
+                query, limit - len(positions), set(positions)
+            )
+        return [self.items[position] for position in positions]
+
+
+index = None
+index_lock = threading.Lock()
+
+
+def get_index():
+    global index
+    version, _ = get_version('ingredients')
+    if index is not None and index.version == version:
+        return index
+    with index_lock:
+        if index is None or index.version != version:
+            index = IngredientIndex(
+                Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ),
+                version=version,
+            )
+    return index
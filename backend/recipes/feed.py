@@ -0,0 +1,157 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.db import connection, connections, transaction
+
+from users.models import Subscription, User
+from users.paginations import get_keyset_filter
+
+from .models import FeedEntry, Recipe
+from .recipes_const import (FEED_FANOUT_MAX_FOLLOWERS, FEED_MAX_LENGTH,
+                            FEED_WORKERS)
+from .versions import invalidate_on_commit
+
+BATCH_SIZE = 1000
+ENTRY_ORDERING = ('-pub_date', '-recipe_id')
+RECIPE_ORDERING = ('-pub_date', '-id')
+TRIM_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM ('
+    'SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC, recipe_id DESC'
+    ') AS position FROM {table}{where}'
+    ') ranked WHERE position > %s)'
+)
+
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(
+    max_workers=FEED_WORKERS, thread_name_prefix='feed'
+)
+
+
+def is_fanned_out(author_id):
+    return User.objects.filter(
+        pk=author_id, subscribers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+    ).exists()
+
+
+def create_entries(entries):
+    while batch := list(islice(entries, BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def iter_subscriptions(author_id, after=0):
+    return Subscription.objects.filter(
+        author_id=author_id, id__gt=after
+    ).order_by('id').values_list('id', 'user_id').iterator()
+
+
+def add_to_feeds(recipe, subscriptions):
+    last_id = 0
+    while batch := list(islice(subscriptions, BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=user_id, recipe=recipe, pub_date=recipe.pub_date
+                )
+                for _, user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+        trim_feeds(user_id for _, user_id in batch)
+        last_id = batch[-1][0]
+    return last_id
+
+
+def fan_out_recipe(recipe_id):
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id, fanned_out=False).only(
+            'id', 'author_id', 'pub_date'
+        ).first()
+        if recipe is None or not is_fanned_out(recipe.author_id):
+            return
+        last_id = add_to_feeds(recipe, iter_subscriptions(recipe.author_id))
+        Recipe.objects.filter(pk=recipe_id).update(fanned_out=True)
+        add_to_feeds(recipe, iter_subscriptions(recipe.author_id, last_id))
+    except Exception:
+        logger.exception('Не удалось разослать рецепт %s по лентам', recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_fan_out(recipe):
+    recipe_id = recipe.pk
+    transaction.on_commit(lambda: executor.submit(fan_out_recipe, recipe_id))
+
+
+def iter_author_entries(user_id, author_id):
+    for recipe_id, pub_date in Recipe.objects.filter(
+        author_id=author_id, fanned_out=True
+    ).order_by(*RECIPE_ORDERING).values_list('id', 'pub_date')[
+        :FEED_MAX_LENGTH
+    ]:
+        yield FeedEntry(
+            user_id=user_id, recipe_id=recipe_id, pub_date=pub_date
+        )
+
+
+def backfill_feed(user_id, author_id):
+    create_entries(iter_author_entries(user_id, author_id))
+    trim_feeds([user_id])
+
+
+def remove_author_from_feed(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def trim_feeds(user_ids=None):
+    params = []
+    where = ''
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        where = f' WHERE user_id IN ({", ".join(["%s"] * len(user_ids))})'
+        params = user_ids
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TRIM_SQL.format(table=FeedEntry._meta.db_table, where=where),
+            params + [FEED_MAX_LENGTH],
+        )
+        return cursor.rowcount
+
+
+def rebuild_feeds():
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        Recipe.objects.filter(fanned_out=True).update(fanned_out=False)
+        Recipe.objects.filter(
+            author__subscribers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+        ).update(fanned_out=True)
+        for user_id, author_id in Subscription.objects.filter(
+            author__subscribers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('user_id', 'author_id').iterator():
+            create_entries(iter_author_entries(user_id, author_id))
+        trim_feeds()
+        invalidate_on_commit('recipes')
+
+
+def get_feed_page(queryset, user, values, limit):
+    entries = FeedEntry.objects.filter(
+        get_keyset_filter(ENTRY_ORDERING, values), user=user
+    ).order_by(*ENTRY_ORDERING).values_list('pub_date', 'recipe_id')[:limit]
+    pulled = Recipe.objects.filter(
+        get_keyset_filter(RECIPE_ORDERING, values),
+        fanned_out=False,
+        author__in=Subscription.objects.filter(user=user).values('author'),
+    ).order_by(*RECIPE_ORDERING).values_list('pub_date', 'id')[:limit]
+    positions = sorted(set(entries) | set(pulled), reverse=True)[:limit]
+    recipes = queryset.in_bulk([recipe_id for _, recipe_id in positions])
+    return [
+        recipes[recipe_id]
+        for _, recipe_id in positions
+        if recipe_id in recipes
+    ]
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .images import get_renditions_field, get_rendition_urls
+
+
+class ImageRenditionsField(serializers.Field):
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return get_rendition_urls(
+            getattr(instance, self.image_field),
+            getattr(instance, get_renditions_field(self.image_field)),
+        )
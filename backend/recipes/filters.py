@@ -1,6 +1,7 @@
 from django_filters.rest_framework import FilterSet, filters
 
 from .models import Ingredient, Recipe, Tag
+from .search import search_recipes
 
 
 class IngredientFilter(FilterSet):
@@ -22,6 +23,7 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     def filter_is_favorited(self, queryset, name, values):
         user = self.request.user
@@ -35,6 +37,10 @@ class RecipeFilter(FilterSet):
             return queryset.filter(in_shopping_cart__user=user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'author', 'is_in_shopping_cart', 'tags',)
+        fields = ('is_favorited', 'author', 'is_in_shopping_cart', 'tags',
+                  'search')
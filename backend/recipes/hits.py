@@ -0,0 +1,98 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from itertools import islice
+
+from django.db import connections
+from django.db.models import Case, F, Value, When
+
+from .models import Recipe
+from .recipes_const import (TRENDING_EPOCH, TRENDING_HALF_LIFE,
+                            VIEWS_FLUSH_BATCH, VIEWS_FLUSH_INTERVAL)
+
+logger = logging.getLogger(__name__)
+pending = Counter()
+lock = threading.Lock()
+flusher_pid = None
+
+
+def get_trending_weight(timestamp=None):
+    timestamp = time.time() if timestamp is None else timestamp
+    return 2 ** ((timestamp - TRENDING_EPOCH) / TRENDING_HALF_LIFE)
+
+
+def record_view(recipe_id):
+    with lock:
+        pending[recipe_id] += 1
+    if flusher_pid != os.getpid():
+        start_flusher()
+
+
+def start_flusher():
+    global flusher_pid
+    with lock:
+        if flusher_pid == os.getpid():
+            return
+        flusher_pid = os.getpid()
+    threading.Thread(
+        target=run_flusher, name='views-flusher', daemon=True
+    ).start()
+
+
+def run_flusher():
+    while True:
+        time.sleep(VIEWS_FLUSH_INTERVAL)
+        try:
+            flush_views()
+        except Exception:
+            logger.exception('Не удалось сохранить просмотры рецептов.')
+        finally:
+            connections.close_all()
+
+
+def get_increment(counts, scale=1):
+    by_count = {}
+    for recipe_id, count in counts.items():
+        by_count.setdefault(count, []).append(recipe_id)
+    return Case(
+        *(
+            When(id__in=ids, then=Value(count * scale))
+            for count, ids in by_count.items()
+        ),
+        default=Value(0 * scale),
+    )
+
+
+def flush_views():
+    global pending
+    with lock:
+        counts, pending = pending, Counter()
+    if not counts:
+        return 0
+    weight = get_trending_weight()
+    items = iter(counts.items())
+    try:
+        while batch := dict(islice(items, VIEWS_FLUSH_BATCH)):
+            Recipe.objects.filter(id__in=batch).update(
+                views_count=F('views_count') + get_increment(batch),
+                trending_score=(
+                    F('trending_score') + get_increment(batch, weight)
+                ),
+            )
+    except Exception:
+        with lock:
+            pending.update(dict(items))
+            pending.update(batch)
+        raise
+    return sum(counts.values())
+
+
+@atexit.register
+def flush_on_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Не удалось сохранить просмотры рецептов.')
@@ -0,0 +1,105 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .recipes_const import (IMAGE_FORMATS, IMAGE_QUALITY, IMAGE_RENDITIONS,
+                            IMAGE_WORKERS)
+from .versions import invalidate
+
+RENDITION_PATH = 'renditions/{digest:.2}/{digest}_{size}.{extension}'
+
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(
+    max_workers=IMAGE_WORKERS, thread_name_prefix='images'
+)
+
+
+def get_renditions_field(field):
+    return f'{field}_renditions'
+
+
+def flatten(image):
+    if image.mode not in ('RGBA', 'LA', 'P'):
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def build_renditions(field_file):
+    with field_file.open('rb') as file:
+        content = file.read()
+    digest = sha256(content).hexdigest()
+    source = ImageOps.exif_transpose(Image.open(BytesIO(content)))
+    renditions = {'source': field_file.name}
+    for size, dimensions in IMAGE_RENDITIONS.items():
+        image = source.copy()
+        image.thumbnail(dimensions, Image.LANCZOS)
+        renditions[size] = {}
+        for extension, image_format in IMAGE_FORMATS.items():
+            path = RENDITION_PATH.format(
+                digest=digest, size=size, extension=extension
+            )
+            if not default_storage.exists(path):
+                buffer = BytesIO()
+                if image_format == 'JPEG':
+                    flatten(image).save(
+                        buffer, image_format, quality=IMAGE_QUALITY,
+                        optimize=True, progressive=True,
+                    )
+                else:
+                    image.save(buffer, image_format, quality=IMAGE_QUALITY)
+                path = default_storage.save(
+                    path, ContentFile(buffer.getvalue())
+                )
+            renditions[size][extension] = path
+    return renditions
+
+
+def process_image(model, pk, field):
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        field_file = getattr(instance, field, None)
+        if not field_file:
+            return
+        if model.objects.filter(pk=pk, **{field: field_file.name}).update(
+            **{get_renditions_field(field): build_renditions(field_file)}
+        ):
+            invalidate('recipes')
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение %s %s', model.__name__, pk
+        )
+    finally:
+        connections.close_all()
+
+
+def schedule_renditions(instance, field):
+    field_file = getattr(instance, field)
+    renditions = getattr(instance, get_renditions_field(field))
+    if not field_file or renditions.get('source') == field_file.name:
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(
+        lambda: executor.submit(process_image, model, pk, field)
+    )
+
+
+def get_rendition_urls(field_file, renditions):
+    if not field_file or renditions.get('source') != field_file.name:
+        return None
+    return {
+        size: {
+            extension: default_storage.url(path)
+            for extension, path in renditions[size].items()
+        }
+        for size in IMAGE_RENDITIONS
+        if size in renditions
+    }
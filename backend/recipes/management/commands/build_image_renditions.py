@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_renditions, get_renditions_field
+from recipes.models import Recipe
+from users.models import User
+
+IMAGE_FIELDS = (
+    (Recipe, 'image'),
+    (User, 'avatar'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии изображений рецептов и аватаров, '
+            'для которых они ещё не построены.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии для всех изображений.',
+        )
+
+    def handle(self, *args, **options):
+        for model, field in IMAGE_FIELDS:
+            renditions_field = get_renditions_field(field)
+            total = 0
+            for instance in model.objects.exclude(
+                **{field: ''}
+            ).exclude(**{f'{field}__isnull': True}).only(
+                'pk', field, renditions_field
+            ).iterator():
+                field_file = getattr(instance, field)
+                source = getattr(instance, renditions_field).get('source')
+                if source == field_file.name and not options['force']:
+                    continue
+                model.objects.filter(pk=instance.pk).update(
+                    **{renditions_field: build_renditions(field_file)}
+                )
+                total += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обработано {total}.'
+            ))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.short_links import fill_missing_short_links, write_redirect_map
+
+
+class Command(BaseCommand):
+    help = ('Выдаёт короткие ссылки рецептам, у которых их нет, и '
+            'выгружает таблицу переадресаций для nginx.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.SHORT_LINKS_MAP)
+
+    def handle(self, *args, **options):
+        created = fill_missing_short_links()
+        written = write_redirect_map(options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Новых коротких ссылок: {created}. '
+            f'Записано в {options["path"]}: {written}.'
+        ))
@@ -0,0 +1,101 @@
+import csv
+import json
+import re
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Ingredient
+from recipes.versions import invalidate
+
+DEFAULT_PATH = settings.BASE_DIR.parent / 'data' / 'ingredients.csv'
+CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) != 2:
+            raise CommandError(f'Некорректная строка CSV: {row}')
+        yield row
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив ингредиентов.')
+    position = 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Файл JSON обрывается на середине.')
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        if not isinstance(item, dict):
+            raise CommandError(f'Некорректный элемент JSON: {item}')
+        yield item['name'], item['measurement_unit']
+        position = end
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из CSV или JSON пакетами. Ингредиенты, '
+            'которые уже есть в базе, пропускаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', type=Path, default=DEFAULT_PATH)
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='По умолчанию определяется по расширению файла.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path.name}')
+        batch_size = options['batch_size']
+        total = Ingredient.objects.count()
+        rows = 0
+        start = time.perf_counter()
+        with open(path, encoding='utf-8') as file:
+            items = READERS[file_format](file)
+            while batch := list(islice(items, batch_size)):
+                Ingredient.objects.bulk_create(
+                    [
+                        Ingredient(
+                            name=name.strip(),
+                            measurement_unit=measurement_unit.strip(),
+                        )
+                        for name, measurement_unit in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                rows += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано строк: {rows}')
+        elapsed = time.perf_counter() - start
+        invalidate('ingredients')
+        created = Ingredient.objects.count() - total
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {rows}, добавлено: {created}, '
+            f'пропущено: {rows - created}. '
+            f'{rows / elapsed if elapsed else rows:.0f} строк/с.'
+        ))
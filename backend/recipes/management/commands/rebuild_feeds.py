@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feeds, trim_feeds
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает ленты подписок по текущим подпискам '
+            'или только обрезает их до допустимой длины.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trim-only', action='store_true',
+            help='Только удалить записи сверх допустимой длины ленты.',
+        )
+
+    def handle(self, *args, **options):
+        if options['trim_only']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено записей: {trim_feeds()}.'
+            ))
+            return
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {FeedEntry.objects.count()}.'
+        ))
@@ -0,0 +1,23 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        recipe_ids = Recipe.objects.values_list('id', flat=True).iterator()
+        total = 0
+        while batch := list(islice(recipe_ids, options['batch_size'])):
+            update_search_index(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {total}.'
+        ))
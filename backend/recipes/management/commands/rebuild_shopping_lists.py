@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingListItem
+from recipes.shopping_cart import (aggregate_shopping_lists,
+                                   rebuild_shopping_lists)
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает таблицу списков покупок из корзин пользователей '
+            'или проверяет, что она с ними совпадает.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить таблицу с корзинами, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            rebuild_shopping_lists()
+            self.stdout.write(self.style.SUCCESS(
+                f'Списки покупок пересобраны, строк: '
+                f'{ShoppingListItem.objects.count()}.'
+            ))
+            return
+        expected = aggregate_shopping_lists().iterator()
+        actual = ShoppingListItem.objects.values_list(
+            'user', 'ingredient', 'total_amount'
+        ).order_by('user', 'ingredient').iterator()
+        mismatches = 0
+        left, right = next(expected, None), next(actual, None)
+        while left or right:
+            if left and right and left[:2] == right[:2]:
+                if left != right:
+                    mismatches += 1
+                    self.stdout.write(f'Ожидалось: {left}, в таблице: {right}')
+                left, right = next(expected, None), next(actual, None)
+            elif right is None or left and left[:2] < right[:2]:
+                mismatches += 1
+                self.stdout.write(f'Нет строки в таблице: {left}')
+                left = next(expected, None)
+            else:
+                mismatches += 1
+                self.stdout.write(f'Лишняя строка в таблице: {right}')
+                right = next(actual, None)
+        if mismatches:
+            raise CommandError(f'Найдено расхождений: {mismatches}.')
+        self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
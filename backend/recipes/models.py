@@ -1,15 +1,22 @@
 import shortuuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Prefetch, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from users.models import User
 
 from .recipes_const import (CHAR_FIELD_MAX_LENGTH,
                             MAX_AMOUNT,
                             MAX_COOKING_TIME,
                             MIN_AMOUNT,
                             MIN_COOKING_TIME,
+                            SHORT_LINK_ATTEMPTS,
                             SHORT_LINK_MAX_LENGTH,
                             SHORT_LINK_LENGTH)
-from users.models import User
 
 
 class Ingredient(models.Model):
@@ -26,6 +33,19 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name'),
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('name',),
+                name='ingredient_name_like_idx',
+                opclasses=('varchar_pattern_ops',),
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -51,6 +71,47 @@ class Tag(models.Model):
         return self.name
 
 
+class SearchVectorIndex(GinIndex):
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(
+                self, model, schema_editor, using=using, **kwargs
+            )
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def generate_short_link():
+    return shortuuid.uuid()[:SHORT_LINK_LENGTH]
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('ingredient__name'),
+            ),
+        )
+
+    def latest_per_author(self, limit):
+        sql, params = self.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).order_by().values('id', 'position').query.sql_with_params()
+        return self.model.objects.filter(id__in=RawSQL(
+            f'SELECT id FROM ({sql}) ranked WHERE position <= %s',
+            (*params, limit),
+        )).order_by('-pub_date', '-id')
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -66,6 +127,11 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         upload_to='recipes/images/'
     )
+    image_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание',
     )
@@ -100,17 +166,100 @@ class Recipe(models.Model):
         null=True,
         unique=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    cart_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    views_count = models.PositiveIntegerField(
+        verbose_name='Просмотры',
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    fanned_out = models.BooleanField(
+        verbose_name='Разослан по лентам',
+        default=False,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if self.short_link or not self._state.adding:
+            return super().save(*args, **kwargs)
+        self.with_short_link(
+            lambda: super(Recipe, self).save(*args, **kwargs)
+        )
 
     def get_or_create_short_link(self):
         if not self.short_link:
-            self.short_link = shortuuid.uuid()[:SHORT_LINK_LENGTH]
-            self.save(update_fields=['short_link'])
+            self.with_short_link(self.set_short_link)
         return self.short_link
 
+    def set_short_link(self):
+        if not Recipe.objects.filter(
+            pk=self.pk, short_link__isnull=True
+        ).update(short_link=self.short_link):
+            self.refresh_from_db(fields=['short_link'])
+
+    def with_short_link(self, save):
+        for _ in range(SHORT_LINK_ATTEMPTS):
+            self.short_link = generate_short_link()
+            try:
+                with transaction.atomic():
+                    return save()
+            except IntegrityError:
+                if not Recipe.objects.filter(
+                    short_link=self.short_link
+                ).exists():
+                    raise
+        self.short_link = None
+        raise IntegrityError('Не удалось подобрать свободную короткую ссылку.')
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'), name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_pulled_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date'),
+                name='recipe_favorites_count_idx',
+            ),
+            models.Index(
+                fields=('-trending_score', '-id'),
+                name='recipe_trending_score_idx',
+            ),
+            SearchVectorIndex(
+                fields=('search_vector',), name='recipe_search_vector_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -141,6 +290,12 @@ class RecipeIngredient(models.Model):
         verbose_name = 'Ингредиент рецепта'
         verbose_name_plural = 'Ингредиенты рецепта'
         ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_recipe_ingredient',
+            ),
+        )
 
     def __str__(self):
         return f'{self.ingredient.name} - {self.amount}'
@@ -200,3 +355,71 @@ class ShoppingCart(models.Model):
     def __str__(self):
         return (f'Рецепт {self.recipe.name} в списке покупок у'
                 f' {self.user.username}')
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Общее количество',
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списка покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.ingredient.name} - {self.total_amount}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='feed',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
@@ -1,6 +1,5 @@
-from rest_framework.pagination import PageNumberPagination
+from users.paginations import CustomPagination as UserPagination
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 6
-    page_size_query_param = 'limit'
+class CustomPagination(UserPagination):
+    cursor_ordering = ('-pub_date', '-id')
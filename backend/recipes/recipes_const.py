@@ -6,3 +6,50 @@ MAX_AMOUNT = 32000
 CHAR_FIELD_MAX_LENGTH = 200
 SHORT_LINK_MAX_LENGTH = 10
 SHORT_LINK_LENGTH = 8
+SHORT_LINK_ATTEMPTS = 5
+SHORT_LINK_LRU_SIZE = 10000
+SHORT_LINK_LRU_TIMEOUT = 60 * 5
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60 * 24
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60 * 24
+SHOPPING_CART_CACHE_MAX_ITEMS = 300
+SEARCH_CONFIG = 'russian'
+SEARCH_RESULTS_LIMIT = 1000
+AUTOCOMPLETE_LIMIT = 50
+AUTOCOMPLETE_MIN_SIMILARITY = 0.5
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+IMAGE_RENDITIONS = {
+    'thumbnail': (160, 160),
+    'card': (640, 480),
+    'full': (1600, 1600),
+}
+IMAGE_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+IMAGE_QUALITY = 80
+IMAGE_WORKERS = 2
+IMAGE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+IMAGE_UPLOAD_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+IMAGE_SIGNATURES = (
+    (0, b'\xff\xd8\xff'),
+    (0, b'\x89PNG\r\n\x1a\n'),
+    (0, b'GIF8'),
+    (8, b'WEBP'),
+)
+FEED_MAX_LENGTH = 1000
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_WORKERS = 2
+VIEWS_FLUSH_INTERVAL = 10
+VIEWS_FLUSH_BATCH = 500
+TRENDING_EPOCH = 1735689600
+TRENDING_HALF_LIFE = 60 * 60 * 24 * 3
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_N_PLUS_ONE_THRESHOLD = 10
+METRICS_LOGGED_DUPLICATES = 3
+PROFILE_RATE_LIMIT = 10
+PROFILE_RATE_PERIOD = 60
+PROFILE_SAMPLE_INTERVAL = 0.005
@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from users.representations import represent_user
+
+from .images import get_rendition_urls
+from .models import Recipe, RecipeIngredient
+from .viewer import get_viewer_state
+
+
+def get_recipe_tags(recipe_ids):
+    tags = defaultdict(list)
+    for recipe_id, id, name, slug in (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('tag__name')
+        .values_list('recipe_id', 'tag_id', 'tag__name', 'tag__slug')
+    ):
+        tags[recipe_id].append({'id': id, 'name': name, 'slug': slug})
+    return tags
+
+
+def get_recipe_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    for recipe_id, id, name, measurement_unit, amount in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('ingredient__name')
+        .values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount',
+        )
+    ):
+        ingredients[recipe_id].append({
+            'id': id,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        })
+    return ingredients
+
+
+def represent_recipes(recipes, request):
+    recipe_ids = [recipe.id for recipe in recipes]
+    if not recipe_ids:
+        return []
+    tags = get_recipe_tags(recipe_ids)
+    ingredients = get_recipe_ingredients(recipe_ids)
+    state = get_viewer_state(request)
+    state.expect_recipes(recipes)
+    authors = {}
+    representations = []
+    for recipe in recipes:
+        author = authors.get(recipe.author_id)
+        if author is None:
+            author = authors[recipe.author_id] = represent_user(
+                recipe.author, request,
+                state.is_subscribed(recipe.author_id),
+            )
+        representations.append({
+            'id': recipe.id,
+            'author': author,
+            'name': recipe.name,
+            'image': recipe.image.url,
+            'images': get_rendition_urls(
+                recipe.image, recipe.image_renditions
+            ),
+            'text': recipe.text,
+            'tags': tags[recipe.id],
+            'ingredients': ingredients[recipe.id],
+            'is_favorited': state.is_favorited(recipe.id),
+            'is_in_shopping_cart': state.is_in_shopping_cart(recipe.id),
+            'cooking_time': recipe.cooking_time,
+        })
+    return representations
+
+
+def represent_recipe(recipe, request):
+    return represent_recipes([recipe], request)[0]
@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (Case, F, FloatField, OuterRef, Subquery, Value,
+                              When)
+
+from .models import Recipe, RecipeIngredient
+from .recipes_const import SEARCH_CONFIG, SEARCH_RESULTS_LIMIT
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+
+class PostgresSearchBackend:
+
+    def update(self, recipe_ids):
+        ingredient_names = Subquery(
+            RecipeIngredient.objects.filter(recipe=OuterRef('pk'))
+            .order_by()
+            .values('recipe')
+            .annotate(
+                names=StringAgg('ingredient__name', ' ', default=Value(''))
+            )
+            .values('names')
+        )
+        name = SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        ingredients = SearchVector(
+            ingredient_names, weight='B', config=SEARCH_CONFIG
+        )
+        text = SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=name + ingredients + text
+        )
+
+    def delete(self, recipe_ids):
+        # Вектор хранится в строке рецепта и удаляется вместе с ней.
+        pass
+
+    def search(self, queryset, query):
+        query = SearchQuery(query, config=SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-pub_date')
+
+
+class SQLiteSearchBackend:
+
+    def create_storage(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f'name, ingredients, text, '
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def update(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        ingredients = defaultdict(list)
+        for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient__name'):
+            ingredients[recipe_id].append(name)
+        rows = [
+            (recipe_id, name, ' '.join(ingredients[recipe_id]), text)
+            for recipe_id, name, text in Recipe.objects.filter(
+                pk__in=recipe_ids
+            ).values_list('id', 'name', 'text')
+        ]
+        self.delete(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+                f'VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def delete(self, recipe_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(recipe_id,) for recipe_id in recipe_ids],
+            )
+
+    def search(self, queryset, query):
+        match = ' '.join(
+            '"{}"*'.format(term.replace('"', '""')) for term in query.split()
+        )
+        if not match:
+            return queryset.none()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}, 10.0, 4.0, 1.0) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY 2 LIMIT %s',
+                [match, SEARCH_RESULTS_LIMIT],
+            )
+            ranks = cursor.fetchall()
+        if not ranks:
+            return queryset.none()
+        return queryset.filter(pk__in=[pk for pk, _ in ranks]).annotate(
+            search_rank=Case(
+                *(When(pk=pk, then=Value(-rank)) for pk, rank in ranks),
+                output_field=FloatField(),
+            )
+        ).order_by('-search_rank', '-pub_date')
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS[connection.vendor]()
+
+
+def update_search_index(recipe_ids):
+    get_backend().update(recipe_ids)
+
+
+def delete_from_search_index(recipe_ids):
+    get_backend().delete(recipe_ids)
+
+
+def search_recipes(queryset, query):
+    return get_backend().search(queryset, query)
@@ -1,13 +1,19 @@
-from django.db.models import F
-from drf_extra_fields.fields import Base64ImageField
+from collections import Counter
+
+from django.db import transaction
+from drf_extra_fields.fields import HybridImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from recipes.fields import ImageRenditionsField
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 from recipes.recipes_const import (MIN_COOKING_TIME,
                                    MIN_AMOUNT,
                                    MAX_COOKING_TIME,
                                    MAX_AMOUNT)
+from recipes.search import update_search_index
+from recipes.shopping_cart import recipe_ingredients_changed
+from recipes.viewer import ViewerStateListSerializer, get_viewer_state
 from users.serializers import CustomUserSerializer
 
 
@@ -33,8 +39,8 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        model = Ingredient
-        fields = ('id', 'name', 'measurement_unit')
+        model = RecipeIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
 class RecipeIngredientsCreateSerializer(serializers.ModelSerializer):
@@ -48,44 +54,37 @@ class RecipeIngredientsCreateSerializer(serializers.ModelSerializer):
 
 
 class RecipeSimpleListSerializer(serializers.ModelSerializer):
+    images = ImageRenditionsField('image')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'images', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
 class RecipeListSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     image = serializers.ReadOnlyField(source='image.url')
+    images = ImageRenditionsField('image')
     tags = TagSerializer(many=True)
-    ingredients = serializers.SerializerMethodField(
-        method_name='get_ingredients'
+    ingredients = RecipeIngredientsSerializer(
+        source='recipe_ingredients', many=True, read_only=True
     )
     cooking_time = serializers.IntegerField(min_value=MIN_COOKING_TIME,
                                             max_value=MAX_COOKING_TIME)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
+    def expect_viewer_state(self, state, recipes):
+        state.expect_recipes(recipes)
+
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return user.favorites.filter(recipe=obj).exists()
+        return get_viewer_state(self.context['request']).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return user.shopping_cart.filter(recipe=obj).exists()
-
-    def get_ingredients(self, obj):
-        return obj.ingredients.values(
-            'id',
-            'name',
-            'measurement_unit',
-            amount=F('recipe_ingredients__amount')
-        )
+        return get_viewer_state(
+            self.context['request']
+        ).is_in_shopping_cart(obj.id)
 
     class Meta:
         model = Recipe
@@ -94,6 +93,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'author',
             'name',
             'image',
+            'images',
             'text',
             'tags',
             'ingredients',
@@ -101,11 +101,14 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'cooking_time',
         )
+        list_serializer_class = ViewerStateListSerializer
 
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
-    tags = TagSerializer(many=True, read_only=True)
+    image = HybridImageField()
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
+    )
     author = CustomUserSerializer(read_only=True)
     ingredients = RecipeIngredientsCreateSerializer(
         many=True,
@@ -113,80 +116,145 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     cooking_time = serializers.IntegerField(min_value=MIN_COOKING_TIME,
                                             max_value=MAX_COOKING_TIME)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
-        tags = self.context['request'].data.get('tags', [])
+        tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(
             author=self.context['request'].user, **validated_data
         )
         self.add_ingredients(ingredients, recipe)
         recipe.tags.set(tags)
+        update_search_index([recipe.id])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = self.context['request'].data.get('ingredients', [])
-        tags = self.context['request'].data.get('tags', [])
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
 
         image = validated_data.pop('image', None)
         if image:
             instance.image = image
 
+        reindex = any(
+            getattr(instance, field) != validated_data[field]
+            for field in ('name', 'text')
+            if field in validated_data
+        )
         instance = super().update(instance, validated_data)
-        instance.tags.set(tags)
-        instance.recipeingredients.all().delete()
-        self.add_ingredients(ingredients, instance)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            reindex |= self.update_ingredients(ingredients, instance)
+        if reindex:
+            update_search_index([instance.id])
         return instance
 
+    def update_ingredients(self, ingredients, recipe):
+        existing = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in existing.items()
+        }
+        created, updated = [], []
+        for ingredient in ingredients:
+            item = existing.pop(ingredient['id'], None)
+            if item is None:
+                created.append(RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredient['ingredient'],
+                    amount=ingredient['amount'],
+                ))
+            elif item.amount != ingredient['amount']:
+                item.amount = ingredient['amount']
+                updated.append(item)
+        if not (created or updated or existing):
+            return False
+        RecipeIngredient.objects.filter(
+            id__in=[item.id for item in existing.values()]
+        ).delete()
+        RecipeIngredient.objects.bulk_update(updated, ['amount'])
+        RecipeIngredient.objects.bulk_create(created)
+        recipe_ingredients_changed(
+            recipe.id,
+            old_amounts,
+            {
+                ingredient['id']: ingredient['amount']
+                for ingredient in ingredients
+            },
+        )
+        return bool(created or existing)
+
     def add_ingredients(self, ingredients, recipe):
         RecipeIngredient.objects.bulk_create(
             [
                 RecipeIngredient(
                     recipe=recipe,
-                    ingredient_id=ingredient['id'],
+                    ingredient=ingredient['ingredient'],
                     amount=ingredient['amount'],
                 )
                 for ingredient in ingredients
             ]
         )
 
+    def get_objects(self, model, ids, errors, name):
+        duplicates = [pk for pk, count in Counter(ids).items() if count > 1]
+        objects = model.objects.in_bulk(set(ids))
+        missing = [pk for pk in dict.fromkeys(ids) if pk not in objects]
+        if duplicates:
+            errors.append(f'Нельзя использовать повторяющиеся {name}: '
+                          f'{", ".join(map(str, duplicates))}.')
+        if missing:
+            errors.append(f'Указаны несуществующие {name}: '
+                          f'{", ".join(map(str, missing))}.')
+        return objects
+
     def validate(self, data):
         if self.instance is None and not data.get('image'):
             raise ValidationError('Необходимо изображение рецепта.')
 
-        request = self.context['request']
-        tags = request.data.get('tags', [])
-        ingredients = request.data.get('ingredients', [])
-
-        if not tags:
-            raise ValidationError('Необходимо выбрать хотя бы один тэг.')
-
-        if not ingredients:
-            raise ValidationError('Необходимо добавить хотя '
-                                  'бы один ингредиент.')
-
-        checked_tags = set()
-        for tag in tags:
-            if tag in checked_tags:
-                raise ValidationError('Нельзя использовать повторяющиеся '
-                                      'тэги .')
-            if not Tag.objects.filter(id=tag).exists():
-                raise ValidationError(f'Указан несуществующий тэг - {tag}.')
-            checked_tags.add(tag)
+        errors = {}
+        tags = data.get('tags')
+        ingredients = data.get('ingredients')
+
+        if tags is not None or not self.partial:
+            errors['tags'] = []
+            if not tags:
+                errors['tags'].append('Необходимо выбрать хотя бы один тэг.')
+            else:
+                objects = self.get_objects(Tag, tags, errors['tags'], 'тэги')
+                data['tags'] = [objects.get(pk) for pk in tags]
+
+        if ingredients is not None or not self.partial:
+            errors['ingredients'] = []
+            if not ingredients:
+                errors['ingredients'].append('Необходимо добавить хотя '
+                                             'бы один ингредиент.')
+            else:
+                objects = self.get_objects(
+                    Ingredient,
+                    [ingredient['id'] for ingredient in ingredients],
+                    errors['ingredients'],
+                    'ингредиенты',
+                )
+                for ingredient in ingredients:
+                    ingredient['ingredient'] = objects.get(ingredient['id'])
 
-        checked_ingredients = set()
-        for ingredient in ingredients:
-            if ingredient['id'] in checked_ingredients:
-                raise ValidationError('Нельзя использовать два '
-                                      'одинаковых ингредиента.')
-            if not Ingredient.objects.filter(id=ingredient['id']).exists():
-                raise ValidationError(f'Указан несуществующий ингредиент '
-                                      f'- {ingredient}.')
-            checked_ingredients.add(ingredient['id'])
+        errors = {field: messages for field, messages in errors.items()
+                  if messages}
+        if errors:
+            raise ValidationError(errors)
         return data
 
     def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.with_related().get(pk=instance.pk)
         return RecipeListSerializer(
-            instance, context={"request": self.context.get("request")}
+            instance, context={"request": request}
         ).data
 
     class Meta:
@@ -0,0 +1,175 @@
+from itertools import islice
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import User
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+from .recipes_const import (SHOPPING_CART_CACHE_MAX_ITEMS,
+                            SHOPPING_CART_CACHE_TIMEOUT)
+
+VERSION_KEY = 'shopping_cart_version:{user_id}'
+ITEMS_KEY = 'shopping_cart:{user_id}:{version}'
+BATCH_SIZE = 1000
+
+
+def get_cart_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_carts(user_ids):
+    cache.delete_many(
+        [VERSION_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+            'ingredient_id', 'amount'
+        )
+    )
+
+
+def update_shopping_lists(user_ids, deltas):
+    user_ids = sorted(set(user_ids))
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        list(
+            User.objects.select_for_update()
+            .filter(id__in=user_ids)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        items = {
+            (item.user_id, item.ingredient_id): item
+            for item in ShoppingListItem.objects.filter(
+                user_id__in=user_ids, ingredient_id__in=deltas
+            )
+        }
+        created, updated, deleted = [], [], []
+        for user_id in user_ids:
+            for ingredient_id, delta in deltas.items():
+                item = items.get((user_id, ingredient_id))
+                if item is None:
+                    if delta > 0:
+                        created.append(ShoppingListItem(
+                            user_id=user_id,
+                            ingredient_id=ingredient_id,
+                            total_amount=delta,
+                        ))
+                    continue
+                item.total_amount += delta
+                if item.total_amount > 0:
+                    updated.append(item)
+                else:
+                    deleted.append(item.id)
+        ShoppingListItem.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        ShoppingListItem.objects.bulk_update(
+            updated, ['total_amount'], batch_size=BATCH_SIZE
+        )
+        ShoppingListItem.objects.filter(id__in=deleted).delete()
+        transaction.on_commit(lambda: invalidate_carts(user_ids))
+
+
+def add_to_shopping_list(user_id, recipe_id):
+    update_shopping_lists([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_from_shopping_list(user_id, recipe_id):
+    update_shopping_lists(
+        [user_id],
+        {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+        },
+    )
+
+
+def recipe_ingredients_changed(recipe_id, old_amounts, new_amounts=None):
+    if new_amounts is None:
+        new_amounts = get_recipe_amounts(recipe_id)
+    deltas = {
+        ingredient_id: new_amounts.get(ingredient_id, 0) - amount
+        for ingredient_id, amount in old_amounts.items()
+    }
+    for ingredient_id, amount in new_amounts.items():
+        deltas.setdefault(ingredient_id, amount)
+    update_shopping_lists(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        ),
+        deltas,
+    )
+
+
+def aggregate_shopping_lists():
+    return (
+        RecipeIngredient.objects.filter(
+            recipe__in_shopping_cart__isnull=False
+        )
+        .values_list('recipe__in_shopping_cart__user', 'ingredient')
+        .annotate(total_amount=Sum('amount'))
+        .order_by('recipe__in_shopping_cart__user', 'ingredient')
+    )
+
+
+def rebuild_shopping_lists():
+    with transaction.atomic():
+        ShoppingListItem.objects.all().delete()
+        items = (
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total_amount,
+            )
+            for user_id, ingredient_id, total_amount
+            in aggregate_shopping_lists().iterator()
+        )
+        while batch := list(islice(items, BATCH_SIZE)):
+            ShoppingListItem.objects.bulk_create(batch)
+        transaction.on_commit(
+            lambda: invalidate_carts(User.objects.values_list('id', flat=True))
+        )
+
+
+def iter_shopping_list(user):
+    key = ITEMS_KEY.format(
+        user_id=user.id, version=get_cart_version(user.id)
+    )
+    items = cache.get(key)
+    if items is not None:
+        yield from items
+        return
+    items = []
+    for item in (
+        ShoppingListItem.objects.filter(user=user)
+        .values_list(
+            'ingredient__name', 'ingredient__measurement_unit',
+            'total_amount',
+        )
+        .order_by('ingredient__name')
+        .iterator()
+    ):
+        if items is not None:
+            items.append(item)
+            if len(items) > SHOPPING_CART_CACHE_MAX_ITEMS:
+                items = None
+        yield item
+    if items is not None:
+        cache.set(key, items, timeout=SHOPPING_CART_CACHE_TIMEOUT)
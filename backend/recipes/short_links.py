@@ -0,0 +1,76 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .lru import LRUCache
+from .models import Recipe
+from .recipes_const import (SHORT_LINK_CACHE_TIMEOUT,
+                            SHORT_LINK_LRU_SIZE,
+                            SHORT_LINK_LRU_TIMEOUT)
+
+LINK_KEY = 'short_link:{code}'
+RECIPE_URL = '/recipes/{recipe_id}'
+MAP_LINE = '/s/{code} {url};\n/s/{code}/ {url};\n'
+CODE_PATTERN = re.compile(r'^[\w-]+$', re.ASCII)
+
+links = LRUCache(SHORT_LINK_LRU_SIZE, timeout=SHORT_LINK_LRU_TIMEOUT)
+
+
+def get_recipe_url(recipe_id):
+    return RECIPE_URL.format(recipe_id=recipe_id)
+
+
+def resolve_short_link(code):
+    recipe_id = links.get(code)
+    if recipe_id is not None:
+        return recipe_id
+    key = LINK_KEY.format(code=code)
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        recipe_id = Recipe.objects.filter(short_link=code).values_list(
+            'id', flat=True
+        ).first()
+        if recipe_id is None:
+            return None
+        cache.set(key, recipe_id, timeout=SHORT_LINK_CACHE_TIMEOUT)
+    links.set(code, recipe_id)
+    return recipe_id
+
+
+def forget_short_link(code):
+    links.delete(code)
+    cache.delete(LINK_KEY.format(code=code))
+
+
+def fill_missing_short_links():
+    created = 0
+    for recipe in Recipe.objects.filter(short_link__isnull=True).only(
+        'id', 'short_link'
+    ).iterator():
+        recipe.get_or_create_short_link()
+        created += 1
+    return created
+
+
+def write_redirect_map(path=None):
+    path = path or settings.SHORT_LINKS_MAP
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    written = 0
+    with open(temporary, 'w', encoding='utf-8') as file:
+        for code, recipe_id in (
+            Recipe.objects.filter(short_link__isnull=False)
+            .values_list('short_link', 'id')
+            .order_by('id')
+            .iterator()
+        ):
+            if not CODE_PATTERN.match(code):
+                continue
+            file.write(MAP_LINE.format(
+                code=code, url=get_recipe_url(recipe_id)
+            ))
+            written += 1
+    os.replace(temporary, path)
+    return written
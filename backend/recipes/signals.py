@@ -0,0 +1,170 @@
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from users.models import Subscription, User
+
+from .counters import change_counter, change_counters
+from .feed import backfill_feed, remove_author_from_feed, schedule_fan_out
+from .images import schedule_renditions
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import BACKENDS, delete_from_search_index, update_search_index
+from .shopping_cart import (add_to_shopping_list, get_recipe_amounts,
+                            recipe_ingredients_changed,
+                            remove_from_shopping_list)
+from .short_links import forget_short_link
+from .versions import (get_viewer_version_name, invalidate,
+                       invalidate_on_commit)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    if created:
+        add_to_shopping_list(instance.user_id, instance.recipe_id)
+        change_counter(Recipe, instance.recipe_id, 'cart_count', 1)
+
+
+def get_origin_model(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
+
+
+def lock_row(instance):
+    return type(instance).objects.select_for_update().filter(
+        pk=instance.pk
+    ).exists()
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, origin=None, **kwargs):
+    if get_origin_model(origin) in (Recipe, User):
+        return
+    if not lock_row(instance):
+        return
+    remove_from_shopping_list(instance.user_id, instance.recipe_id)
+    change_counter(Recipe, instance.recipe_id, 'cart_count', -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_carts_deleted(sender, instance, **kwargs):
+    recipe_ingredients_changed(
+        instance.id, get_recipe_amounts(instance.id), {}
+    )
+
+
+@receiver(pre_delete, sender=User)
+def user_cart_deleted(sender, instance, **kwargs):
+    change_counters(
+        Recipe,
+        list(instance.shopping_cart.values_list('recipe_id', flat=True)),
+        'cart_count',
+        -1,
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(pre_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    if lock_row(instance):
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+        schedule_fan_out(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    schedule_renditions(instance, 'image')
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, **kwargs):
+    schedule_renditions(instance, 'avatar')
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+    delete_from_search_index([instance.id])
+    if instance.short_link:
+        forget_short_link(instance.short_link)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added(sender, instance, created, **kwargs):
+    if created:
+        backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    remove_author_from_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    invalidate('ingredients')
+    if not created:
+        update_search_index(
+            instance.recipes.values_list('id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    invalidate('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    invalidate('tags')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def recipes_changed(sender, **kwargs):
+    invalidate_on_commit('recipes')
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def recipe_marks_changed(sender, instance, **kwargs):
+    invalidate_on_commit(get_viewer_version_name(instance.user_id))
+    invalidate_on_commit('recipes_counters')
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def subscriptions_changed(sender, instance, **kwargs):
+    invalidate_on_commit(get_viewer_version_name(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields == {'last_login'}:
+        return
+    if Recipe.objects.filter(author=instance).exists():
+        invalidate_on_commit('recipes')
+
+
+def create_search_storage(sender, using, **kwargs):
+    connection = connections[using]
+    backend = BACKENDS.get(connection.vendor)
+    if hasattr(backend, 'create_storage'):
+        with connection.cursor() as cursor:
+            backend().create_storage(cursor)
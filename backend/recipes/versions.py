@@ -0,0 +1,30 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'data_version:{name}'
+VIEWER_VERSION = 'viewer:{user_id}'
+
+
+def get_version(name):
+    key = VERSION_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex, time.time()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate(name):
+    cache.delete(VERSION_KEY.format(name=name))
+
+
+def invalidate_on_commit(name):
+    transaction.on_commit(lambda: invalidate(name))
+
+
+def get_viewer_version_name(user_id):
+    return VIEWER_VERSION.format(user_id=user_id)
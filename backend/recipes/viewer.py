@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import models
+from django.db.models import CharField, Value
+from rest_framework import serializers
+
+from users.models import Subscription
+
+from .models import Favorite, ShoppingCart
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+SUBSCRIPTIONS = 'subscriptions'
+
+SOURCES = {
+    FAVORITES: (Favorite, 'recipe_id'),
+    SHOPPING_CART: (ShoppingCart, 'recipe_id'),
+    SUBSCRIPTIONS: (Subscription, 'author_id'),
+}
+
+
+class ViewerState:
+
+    def __init__(self, user):
+        self.user = user
+        self.pending = defaultdict(set)
+        self.checked = defaultdict(set)
+        self.found = defaultdict(set)
+
+    def expect(self, name, ids):
+        if self.user.is_authenticated:
+            self.pending[name].update(
+                id for id in ids if id not in self.checked[name]
+            )
+
+    def remember(self, name, ids):
+        ids = set(ids)
+        self.checked[name] |= ids
+        self.found[name] |= ids
+        self.pending[name] -= ids
+
+    def contains(self, name, id):
+        if not self.user.is_authenticated:
+            return False
+        if id not in self.checked[name]:
+            self.pending[name].add(id)
+            self.load()
+        return id in self.found[name]
+
+    def load(self):
+        pending = {name: ids for name, ids in self.pending.items() if ids}
+        self.pending.clear()
+        querysets = []
+        for name, ids in pending.items():
+            model, field = SOURCES[name]
+            querysets.append(
+                model.objects.filter(user=self.user, **{f'{field}__in': ids})
+                .annotate(source=Value(name, output_field=CharField()))
+                .values_list(field, 'source')
+            )
+        for id, name in querysets[0].union(*querysets[1:], all=True):
+            self.found[name].add(id)
+        for name, ids in pending.items():
+            self.checked[name] |= ids
+
+    def expect_recipes(self, recipes):
+        recipe_ids = [recipe.id for recipe in recipes]
+        self.expect(FAVORITES, recipe_ids)
+        self.expect(SHOPPING_CART, recipe_ids)
+        self.expect(SUBSCRIPTIONS, [recipe.author_id for recipe in recipes])
+
+    def expect_authors(self, authors):
+        self.expect(SUBSCRIPTIONS, [author.id for author in authors])
+
+    def is_favorited(self, recipe_id):
+        return self.contains(FAVORITES, recipe_id)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return self.contains(SHOPPING_CART, recipe_id)
+
+    def is_subscribed(self, author_id):
+        return self.contains(SUBSCRIPTIONS, author_id)
+
+
+def get_viewer_state(request):
+    state = getattr(request, 'viewer_state', None)
+    if state is None or state.user is not request.user:
+        state = request.viewer_state = ViewerState(request.user)
+    return state
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        items = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        request = self.context.get('request')
+        if request is not None:
+            self.child.expect_viewer_state(get_viewer_state(request), items)
+        return super().to_representation(items)
@@ -7,7 +7,8 @@ from .models import Subscription, User
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name',
-                    'last_name', 'is_active', 'is_staff', 'is_superuser')
+                    'last_name', 'is_active', 'is_staff', 'is_superuser',
+                    'recipes_count', 'subscribers_count')
     search_fields = ('username', 'email',)
     list_filter = ('is_staff', 'is_superuser', 'is_active')
 
@@ -0,0 +1,65 @@
+import copy
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.lru import LRUCache
+
+from .models import User
+from .users_const import TOKEN_CACHE_TIMEOUT, TOKEN_LRU_SIZE, TOKEN_LRU_TIMEOUT
+
+TOKEN_KEY = 'auth_token:{key}'
+
+tokens = LRUCache(TOKEN_LRU_SIZE, timeout=TOKEN_LRU_TIMEOUT)
+
+
+def get_user_fields():
+    return [
+        field.attname for field in User._meta.concrete_fields
+        if field.name != 'password'
+    ]
+
+
+def get_token_user(key):
+    entry = cache.get(TOKEN_KEY.format(key=key))
+    if entry is None:
+        values = User.objects.filter(auth_token__key=key).values(
+            *get_user_fields()
+        ).first()
+        if values is None:
+            return None
+        entry = (uuid4().hex, values)
+        cache.set(
+            TOKEN_KEY.format(key=key), entry, timeout=TOKEN_CACHE_TIMEOUT
+        )
+    revision, values = entry
+    cached = tokens.get(key)
+    if cached is not None and cached[0] == revision:
+        return cached[1]
+    user = User.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+    tokens.set(key, (revision, user))
+    return user
+
+
+def forget_tokens(keys):
+    keys = list(keys)
+    for key in keys:
+        tokens.delete(key)
+    cache.delete_many([TOKEN_KEY.format(key=key) for key in keys])
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        user = get_token_user(key)
+        if user is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
@@ -17,6 +17,11 @@ class User(AbstractUser):
         blank=True,
         default=None,
     )
+    avatar_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии аватара',
+        default=dict,
+        editable=False,
+    )
     first_name = models.CharField(
         verbose_name='Имя',
         max_length=NAME_MAX_LENGTH,
@@ -25,6 +30,16 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=NAME_MAX_LENGTH,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['id']
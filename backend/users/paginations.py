@@ -1,6 +1,120 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .users_const import MAX_ID, MAX_PAGE_SIZE, PAGE_SIZE
+
+
+def parse_id(value):
+    value = int(value)
+    if not 0 < value <= MAX_ID:
+        raise ValueError(value)
+    return value
+
+
+CURSOR_PARSERS = {
+    'id': parse_id,
+    'pub_date': parse_datetime,
+}
+
+
+def get_keyset_filter(ordering, values):
+    condition = Q()
+    if values is None:
+        return condition
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
 
 
 class CustomPagination(PageNumberPagination):
-    page_size = 6
+    page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        order_by = queryset.query.order_by
+        if order_by and tuple(order_by) != self.cursor_ordering:
+            raise ValidationError(
+                {self.cursor_query_param: 'Курсорная пагинация доступна '
+                                          'только с сортировкой по '
+                                          'умолчанию.'}
+            )
+        queryset = queryset.order_by(*self.cursor_ordering)
+        return self.paginate_keyset(
+            request,
+            lambda values, limit: list(queryset.filter(
+                get_keyset_filter(self.cursor_ordering, values)
+            )[:limit]),
+        )
+
+    def paginate_keyset(self, request, get_page):
+        self.cursor_mode = True
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        values = self.decode_cursor(cursor) if cursor else None
+        page_size = self.get_page_size(request)
+        page = get_page(values, page_size + 1)
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def encode_cursor(self, instance):
+        values = [
+            getattr(instance, field.lstrip('-'))
+            for field in self.cursor_ordering
+        ]
+        return urlsafe_b64encode(json.dumps(
+            values, default=lambda value: value.isoformat()
+        ).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            values = None
+        count = len(self.cursor_ordering)
+        if not isinstance(values, list) or len(values) != count:
+            raise NotFound('Неверный курсор.')
+        try:
+            values = [
+                CURSOR_PARSERS[field.lstrip('-')](value)
+                for field, value in zip(self.cursor_ordering, values)
+            ]
+        except (TypeError, ValueError):
+            raise NotFound('Неверный курсор.')
+        if None in values:
+            raise NotFound('Неверный курсор.')
+        return values
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
@@ -0,0 +1,19 @@
+from recipes.images import get_rendition_urls
+
+
+def represent_user(user, request, is_subscribed):
+    return {
+        'email': user.email,
+        'id': user.id,
+        'username': user.username,
+        'avatar': (
+            request.build_absolute_uri(user.avatar.url)
+            if user.avatar else None
+        ),
+        'avatar_images': get_rendition_urls(
+            user.avatar, user.avatar_renditions
+        ),
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_subscribed': is_subscribed,
+    }
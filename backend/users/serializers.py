@@ -1,15 +1,19 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
+from drf_extra_fields.fields import HybridImageField
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import SerializerMethodField
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.fields import ImageRenditionsField
+from recipes.viewer import ViewerStateListSerializer, get_viewer_state
+
 from .models import Subscription, User
 
 
 class CustomUserSerializer(UserSerializer):
-    avatar = Base64ImageField()
+    avatar = HybridImageField()
+    avatar_images = ImageRenditionsField('avatar')
     is_subscribed = SerializerMethodField(read_only=True)
 
     class Meta:
@@ -19,10 +23,15 @@ class CustomUserSerializer(UserSerializer):
             'id',
             'username',
             'avatar',
+            'avatar_images',
             'first_name',
             'last_name',
             'is_subscribed',
         )
+        list_serializer_class = ViewerStateListSerializer
+
+    def expect_viewer_state(self, state, users):
+        state.expect_authors(users)
 
     def validate(self, attrs):
         request = self.context['request']
@@ -39,10 +48,7 @@ class CustomUserSerializer(UserSerializer):
         return super().update(instance, validated_data)
 
     def get_is_subscribed(self, obj):
-        user = self.context['request']
-        if user.user.is_anonymous:
-            return False
-        return user.user.subscribes.filter(author=obj).exists()
+        return get_viewer_state(self.context['request']).is_subscribed(obj.id)
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -59,9 +65,19 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         )
 
 
+def get_recipes_limit(request):
+    value = request.query_params.get('recipes_limit')
+    if value is None:
+        return None
+    try:
+        return serializers.IntegerField(min_value=0).run_validation(value)
+    except ValidationError as error:
+        raise ValidationError({'recipes_limit': error.detail})
+
+
 class SubscriptionSerializer(CustomUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -69,6 +85,7 @@ class SubscriptionSerializer(CustomUserSerializer):
             'id',
             'username',
             'avatar',
+            'avatar_images',
             'first_name',
             'last_name',
             'email',
@@ -78,11 +95,13 @@ class SubscriptionSerializer(CustomUserSerializer):
         )
         read_only_fields = ('email', 'username',
                             'first_name', 'last_name', 'avatar')
+        list_serializer_class = ViewerStateListSerializer
 
     def validate(self, data):
         author = self.instance
-        user = self.context['request'].user
-        if user.subscribes.filter(author=author).exists():
+        request = self.context['request']
+        user = request.user
+        if get_viewer_state(request).is_subscribed(author.id):
             raise ValidationError(
                 detail='Вы уже подписаны на этого пользователя!',
                 code=status.HTTP_400_BAD_REQUEST,
@@ -96,18 +115,17 @@ class SubscriptionSerializer(CustomUserSerializer):
 
     def get_recipes(self, obj):
         from recipes.serializers import RecipeSimpleListSerializer
-        request = self.context['request']
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[: int(limit)]
+        if hasattr(obj, 'recipe_previews'):
+            recipes = obj.recipe_previews
+        else:
+            recipes = obj.recipes.all()
+            limit = get_recipes_limit(self.context['request'])
+            if limit is not None:
+                recipes = recipes[:limit]
         serializer = RecipeSimpleListSerializer(recipes, many=True,
                                                 read_only=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class SubscribeSerializer(serializers.ModelSerializer):
 
@@ -1,2 +1,8 @@
 EMAIL_MAX_LENGTH = 254
 NAME_MAX_LENGTH = 150
+PAGE_SIZE = 6
+MAX_PAGE_SIZE = 100
+MAX_ID = 2 ** 63 - 1
+TOKEN_LRU_SIZE = 10000
+TOKEN_LRU_TIMEOUT = 30
+TOKEN_CACHE_TIMEOUT = 60 * 60
@@ -1,14 +1,19 @@
+from django.db.models import Prefetch, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api.parsers import ImageMultiPartParser
+from recipes.models import Recipe
+from recipes.viewer import SUBSCRIPTIONS, get_viewer_state
 from users.paginations import CustomPagination
 from .models import Subscription, User
 from .serializers import (CustomUserSerializer, SubscribeSerializer,
-                          SubscriptionSerializer)
+                          SubscriptionSerializer, get_recipes_limit)
 
 
 class CustomUserViewSet(UserViewSet):
@@ -27,6 +32,7 @@ class CustomUserViewSet(UserViewSet):
         author = get_object_or_404(User, id=self.kwargs.get('id'))
 
         if request.method == 'POST':
+            get_recipes_limit(request)
             serializer = SubscribeSerializer(
                 data={
                     'user': user.id,
@@ -53,8 +59,18 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
+        limit = get_recipes_limit(request)
         queryset = User.objects.filter(subscribers__user=request.user)
         pages = self.paginate_queryset(queryset)
+        get_viewer_state(request).remember(
+            SUBSCRIPTIONS, [author.id for author in pages]
+        )
+        recipes = Recipe.objects.filter(author__in=pages)
+        if limit is not None:
+            recipes = recipes.latest_per_author(limit)
+        prefetch_related_objects(pages, Prefetch(
+            'recipes', queryset=recipes, to_attr='recipe_previews'
+        ))
         serializer = SubscriptionSerializer(
             pages,
             many=True,
@@ -68,13 +84,15 @@ class CustomUserViewSet(UserViewSet):
         detail=False,
         methods=['put', 'patch', 'delete'],
         permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, ImageMultiPartParser],
         url_path='me/avatar',
     )
     def avatar(self, request):
         user = request.user
         serializer = CustomUserSerializer(user,
                                           data=request.data,
-                                          partial=True)
+                                          partial=True,
+                                          context={'request': request})
 
         if request.method == 'DELETE':
             if user.avatar: